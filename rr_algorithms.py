@@ -41,17 +41,109 @@ def get_parameterRB(p, bpmPac, dist):
 
     return paramSetRB, id
 
-def read_csvC(filenameC):
+class CompactTimestamps:
+    '''
+    Timestamps in ms, stored as int64 start plus either a uniform float64 step (in ms)
+    or int32 offsets from start. start and offsets are counted in ticks of 0.1ms,
+    so int32 offsets cover ~59h and the full ms offset of device timestamps is kept only once.
+    Indexing with an int and np.asarray give timestamps in ms (float64).
+    '''
+    tick = 0.1 # ms
+
+    def __init__(self, start, size, step=None, offsets=None):
+        self.start = np.int64(start) # in ticks
+        self.size = int(size)
+        # float64 step, a float32 step drifts (~1ms after 8h at 30fps)
+        self.step = None if step is None else np.float64(step) # in ms
+        self.offsets = None if offsets is None else np.asarray(offsets, dtype=np.int32) # in ticks
+
+    @classmethod
+    def from_array(cls, ts):
+        # uniform step if every timestamp is met within half a tick, offsets otherwise
+        ts = np.asarray(ts)
+        start = np.int64(np.round(ts[0]/cls.tick))
+        offsets = np.round(ts/cls.tick - start)
+        if offsets[-1] > np.iinfo(np.int32).max:
+            raise ValueError('timestamps span more than int32 ticks of '+str(cls.tick)+'ms')
+        if ts.size > 1:
+            step = (ts[-1] - ts[0])/(ts.size - 1)
+            if np.all(np.abs(np.arange(ts.size)*step/cls.tick - offsets) <= 0.5):
+                return cls(start, ts.size, step=step)
+        return cls(start, ts.size, offsets=offsets)
+
+    def relative(self, first=0, last=None):
+        # timestamps in ms from start of indices first:last, float64
+        last = self.size if last is None else last
+        if self.offsets is None:
+            return np.arange(first, last)*self.step
+        return self.offsets[first:last]*self.tick
+
+    def search(self, t):
+        # index of first timestamp >= t (in ms from start)
+        if self.offsets is None:
+            return int(np.clip(np.ceil(t/self.step), 0, self.size))
+        # int32 query, so the offsets are not cast to another dtype
+        t = min(np.ceil(t/self.tick), np.iinfo(np.int32).max)
+        return int(np.searchsorted(self.offsets, np.int32(t)))
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError('timestamp index out of range')
+        if self.offsets is None:
+            return self.start*self.tick + index*self.step
+        return (self.start + np.int64(self.offsets[index]))*self.tick
+
+    def __array__(self, dtype=None, copy=None):
+        return (self.start*self.tick + self.relative()).astype(dtype or np.float64, copy=False)
+
+    @property
+    def nbytes(self):
+        return 8 + (8 if self.offsets is None else self.offsets.nbytes)
+
+class CompactSignal:
+    '''
+    Signal of CompactTimestamps ts and float32 samples data.
+    Unpacks like the (ts, data) pairs of the other functions: tsC, dataC = signal
+    '''
+    def __init__(self, ts, data):
+        self.ts = ts if isinstance(ts, CompactTimestamps) else CompactTimestamps.from_array(ts)
+        self.data = np.asarray(data, dtype=np.float32) # no copy if already float32
+
+    def __iter__(self):
+        return iter((self.ts, self.data))
+
+    def __len__(self):
+        return self.ts.size
+
+    @property
+    def nbytes(self):
+        return self.ts.nbytes + self.data.nbytes
+
+def read_csvC(filenameC, compact=False):
+    # compact: CompactSignal instead of float64 arrays (unpacks into tsC, dataC as well)
     with open (filenameC) as fC:
-        arrayC = np.loadtxt(filenameC, delimiter=',', skiprows=1)
-    tsC = arrayC[:,0] # in ms
-    dataC = arrayC[:,1] # depth set in mm
+        if compact:
+            arrayC = np.loadtxt(filenameC, delimiter=',', skiprows=1,
+                                dtype={'names': ('ts', 'data'), 'formats': (np.float64, np.float32)})
+            tsC = CompactTimestamps.from_array(arrayC['ts']) # in ms
+            dataC = arrayC['data'] # depth set in mm
+        else:
+            arrayC = np.loadtxt(filenameC, delimiter=',', skiprows=1)
+            tsC = arrayC[:,0] # in ms
+            dataC = arrayC[:,1] # depth set in mm
     dataC = (dataC - np.mean(dataC))*-1 # dataC and dataRB act in opposite ways:
                                         # Exhl.: more depth, less force (breast smaller)
                                         # Inhl.: less depth, more force (breast wider)
+    if compact:
+        return CompactSignal(tsC, dataC)
     return tsC, dataC
 
-def read_csvRB(filenameRB, id):
+def read_csvRB(filenameRB, id, compact=False):
     ids = [0, 3, 6, 9, 12, 15]
     # col0+col1: 15bpm_1m_10fps_probX tsRB+dataRB
     # col3+col4: 15bpm_2m_10fps_probX tsRB+dataRB
@@ -59,18 +151,78 @@ def read_csvRB(filenameRB, id):
     # col9+col10: 10bpm_1m_10fps_probX tsRB+dataRB
     # col12+col13: 10bpm_2m_10fps_probX tsRB+dataRB
     # col15+col16: 10bpm_3m_10fps_probX tsRB+dataRB
+    # compact: CompactSignal instead of float64 arrays (unpacks into tsRB, dataRB as well)
     with open (filenameRB) as fRB:
-        arrayRB = np.genfromtxt(filenameRB, delimiter=';', skip_header=2, usecols=(ids[id], ids[id]+1))
-    tsRB = arrayRB[:,0]*1000 # s-->ms
-    dataRB = arrayRB[:,1] # force set in N
+        if compact:
+            arrayRB = np.genfromtxt(filenameRB, delimiter=';', skip_header=2, usecols=(ids[id], ids[id]+1),
+                                    dtype={'names': ('ts', 'data'), 'formats': (np.float64, np.float32)})
+            tsRB = arrayRB['ts']*1000 # s-->ms
+            dataRB = arrayRB['data'] # force set in N
+        else:
+            arrayRB = np.genfromtxt(filenameRB, delimiter=';', skip_header=2, usecols=(ids[id], ids[id]+1))
+            tsRB = arrayRB[:,0]*1000 # s-->ms
+            dataRB = arrayRB[:,1] # force set in N
     # removing possible nan-entries
     tsRB = tsRB[~(np.isnan(tsRB))]
     dataRB = dataRB[~(np.isnan(dataRB))]
     dataRB = dataRB - np.mean(dataRB)
 
+    if compact:
+        return CompactSignal(tsRB, dataRB)
     return tsRB, dataRB
 
-def interpolate(ts, data, freq, timeScale=1000):
+def get_mean_depth(frame, ROI):
+    # Get ROI
+    ROI_top = ROI[0]
+    ROI_bottom = ROI[1]
+    ROI_left = ROI[2]
+    ROI_right = ROI[3]
+    # matrix depth_image containing depth value in mm for every pixel x, y
+    # frame: depth frame or depth image as array
+    depth_image = np.asanyarray(frame.get_data() if hasattr(frame, 'get_data') else frame)
+    depth_image_ROI = depth_image[ROI_top:ROI_bottom+1, ROI_left:ROI_right+1]   # caution: here indexes row, col; not x, y
+    # entries = 0 have no depth, mean of all other values without casting the array to float
+    valid = np.count_nonzero(depth_image_ROI)
+    if valid == 0:
+        return np.nan
+    mean_depth = depth_image_ROI.sum(dtype=np.float64)/valid # unit already mm
+    return mean_depth
+
+def get_median_depth(frame, ROI):
+    # Get ROI
+    ROI_top = ROI[0]
+    ROI_bottom = ROI[1]
+    ROI_left = ROI[2]
+    ROI_right = ROI[3]
+    # matrix depth_image containing depth value in mm for every pixel x, y
+    # frame: depth frame or depth image as array
+    depth_image = np.asanyarray(frame.get_data() if hasattr(frame, 'get_data') else frame)
+    depth_image_ROI = depth_image[ROI_top:ROI_bottom + 1,
+                      ROI_left:ROI_right + 1]  # caution: here indexes row, col; not x, y
+    # entries = 0 have no depth, median of all other values without casting the array to float
+    depth_valid = depth_image_ROI[depth_image_ROI != 0]
+    if depth_valid.size == 0:
+        return np.nan
+    median_depth = np.median(depth_valid)  # unit already mm
+    return median_depth
+
+def interpolate(ts, data, freq, timeScale=1000, chunk=16384):
+    if isinstance(ts, CompactTimestamps):
+        # compact: uniform timestamps from 0 with step timeStep, float32 data
+        # interpolated in chunks of the new grid into a float32 array, float64 only per chunk
+        timeStep = timeScale/freq
+        # already on this grid within half a tick at the last sample, no copy
+        if ts.offsets is None and abs(ts.step - timeStep)*ts.size <= ts.tick/2:
+            return CompactSignal(CompactTimestamps(0, ts.size, step=timeStep), data)
+        tsCount = int(ts.relative(ts.size-1)[0] / timeStep)
+        dataNew = np.empty(tsCount+1, dtype=np.float32)
+        for k in range(0, tsCount+1, chunk):
+            tsNew = np.arange(k, min(k+chunk, tsCount+1)) * timeStep
+            # old samples around the chunk, one more on each side
+            first = max(ts.search(tsNew[0]) - 2, 0)
+            last = min(ts.search(tsNew[-1]) + 2, ts.size)
+            dataNew[k:k+tsNew.size] = np.interp(tsNew, ts.relative(first, last), data[first:last])
+        return CompactSignal(CompactTimestamps(0, tsCount+1, step=timeStep), dataNew)
     tsAligned = np.array(ts) - ts[0]
     timeStep = timeScale/freq
     tsCount = int(tsAligned[-1] / timeStep)
@@ -111,6 +263,7 @@ def align(tsCI, dataCI, tsRBI, dataRBI, freq, timeScale = 1000):
     '''
     Precondition: tsC, tsRB same sample steps, e.g. 0, 666.666... ms for 15fps (cf. interpolation)
     Shift of shorter dataset x-wise only discretely by prementioned steps
+    CompactTimestamps (cf. interpolate) are shifted and cropped by index, data stay views
     :param tsCI: interpolated
     :param dataCI: interpolated
     :param tsRBI: interpolated
@@ -119,6 +272,7 @@ def align(tsCI, dataCI, tsRBI, dataRBI, freq, timeScale = 1000):
     :return: tsCal, dataCal, tsRBal, dataRBal
     '''
     timeStep = timeScale/freq
+    compact = isinstance(tsCI, CompactTimestamps) # CompactTimestamps of interpolate, both from 0
     cropL = np.int16(np.ceil(3000/timeStep)) # get crop length ~3s:
     deltaSize = np.abs(tsCI.size - tsRBI.size)
 
@@ -136,7 +290,10 @@ def align(tsCI, dataCI, tsRBI, dataRBI, freq, timeScale = 1000):
             # ci_Set[i] = [lo, hi]
 
         idMax = np.argmax(r_Set) #position of highest correlation coefficient
-        tsCI += tsRBI[idMax] - tsCI[cropL] # shift of ts of shorter signal
+        if compact:
+            shift = idMax - cropL # index of RB matching first sample of C
+        else:
+            tsCI += tsRBI[idMax] - tsCI[cropL] # shift of ts of shorter signal
 
     else:
         dataShort = dataRBI[cropL:-cropL]
@@ -148,10 +305,26 @@ def align(tsCI, dataCI, tsRBI, dataRBI, freq, timeScale = 1000):
             # ci_Set[i] = [lo, hi]
 
         idMax = np.argmax(r_Set)
-        tsRBI += tsCI[idMax] - tsRBI[cropL]
+        if compact:
+            shift = cropL - idMax
+        else:
+            tsRBI += tsCI[idMax] - tsRBI[cropL]
 
     # perform alignment and crop both signals to 56s
     tsL = 56000
+    if compact:
+        # same grid: shift and crop by index, the cropped data are views
+        if shift < 0:
+            dataCI = dataCI[-shift:]
+        else:
+            dataRBI = dataRBI[shift:]
+        tsCount = np.count_nonzero(np.round(np.arange(int(tsL/timeStep) + 3) * timeStep, decimals=6) <= tsL+timeStep)
+        dataCal = dataCI[:tsCount]
+        dataRBal = dataRBI[:tsCount]
+        tsCal = CompactTimestamps(0, dataCal.size, step=timeStep)
+        tsRBal = CompactTimestamps(0, dataRBal.size, step=timeStep)
+        return tsCal, dataCal, tsRBal, dataRBal
+
     if tsCI[0] < tsRBI[0]:
         index = np.argmin(np.abs(tsCI - tsRBI[0]))
         tsCI = np.round(tsCI[index:] - tsRBI[0], decimals=6)
@@ -171,20 +344,18 @@ def align(tsCI, dataCI, tsRBI, dataRBI, freq, timeScale = 1000):
 
     return tsCal, dataCal, tsRBal, dataRBal
 
-def get_bpm(dataC, dataRB, bpmPac, freq, timeScale=1000):
+def get_bpm_signal(data, bpmPac, freq, timeScale=1000):
     '''
-    Core consists in memorizing timestamps of RR-peaks inside the given datasets.
+    Memorizing timestamps of RR-peaks inside the given dataset.
     Then time differences between peaks are calculated and averaged --> period time
     --> bpm
-    Error is difference between bpmC and bpmRB.
 
-    bpmPac - bpm as specified during paced breathing
-    :param dataC:
-    :param dataRB:
+    bpmPac - bpm as specified during paced breathing (or supposed bpm without pacing)
+    :param data:
     :param bpmPac:
     :param freq:
     :param timeScale:
-    :return: bpmC, bpmRB, error
+    :return: bpm, nan if less than two peaks found
     '''
     beatPac = 60*timeScale/bpmPac
     timeStep = timeScale/freq
@@ -192,24 +363,37 @@ def get_bpm(dataC, dataRB, bpmPac, freq, timeScale=1000):
 
     # width = np.int16(np.round(spbPac/4)) # comment out for median method
     distance = np.int16(np.round(spbPac * 0.8))
-    peaksRB, _ = scipy.signal.find_peaks(dataRB, distance=distance)
-    peaksC, _ = scipy.signal.find_peaks(dataC, distance=distance)
+    peaks, _ = scipy.signal.find_peaks(data, distance=distance)
+    if peaks.size < 2:
+        return np.nan
 
-    tsdifRB = np.zeros(np.size(peaksRB)-1)
-    tsdifC = np.zeros(np.size(peaksC)-1)
-    for i in range(0, peaksRB.size - 1):
-        tsdifRB[i] = peaksRB[i + 1] - peaksRB[i]
-    for j in range(0, peaksC.size - 1):
-        tsdifC[j] = peaksC[j + 1] - peaksC[j]
+    tsdif = np.zeros(np.size(peaks)-1)
+    for i in range(0, peaks.size - 1):
+        tsdif[i] = peaks[i + 1] - peaks[i]
 
-    spbRB = np.mean(tsdifRB)
-    spbC = np.mean(tsdifC)
+    spb = np.mean(tsdif)
+    beat = spb * timeStep
+    bpm = (60*timeScale)/beat
 
-    beatRB = spbRB * timeStep
-    beatC = spbC * timeStep
+    return bpm
+
+def get_bpm(dataC, dataRB, bpmPac, freq, timeScale=1000):
+    '''
+    Core consists in memorizing timestamps of RR-peaks inside the given datasets.
+    Then time differences between peaks are calculated and averaged --> period time
+    --> bpm (cf. get_bpm_signal)
+    Error is difference between bpmC and bpmRB.
 
-    bpmRB = (60*timeScale)/beatRB
-    bpmC = (60*timeScale)/beatC
+    bpmPac - bpm as specified during paced breathing
+    :param dataC:
+    :param dataRB:
+    :param bpmPac:
+    :param freq:
+    :param timeScale:
+    :return: bpmC, bpmRB, error
+    '''
+    bpmRB = get_bpm_signal(dataRB, bpmPac, freq, timeScale)
+    bpmC = get_bpm_signal(dataC, bpmPac, freq, timeScale)
 
     error = np.abs(bpmC-bpmRB)
 
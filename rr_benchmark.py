@@ -0,0 +1,224 @@
+"""
+Benchmark of the remote respiratory rate (RR) system on a synthetic cohort (cf. rr_synthetic)
+
+Every stage of rr_compareCandRB is timed on its own and end to end:
+# interpolate: both signals to the sampling frequency of C
+# align: alignment of C and RB, crop to 56s
+# median_filter: post filtering of C
+# get_bpm: RR of C and RB
+# pearsonr_ci: PCC comparing C to RB
+# end_to_end: all of the above in a row
+The ROI reducers of rr_readC (get_mean_depth, get_median_depth) are timed per frame.
+Besides timings the accuracy (bpm of C and RB against paced bpm, PCC) is kept.
+
+Under "Set parameters" one can choose the cohort and the mode:
+# mode = 'record': results are stored as new baseline
+# mode = 'compare': results are compared to the stored baseline, slowdowns and
+#                   accuracy drift are flagged and the program exits with 1
+Every stage is timed repeats times, the median and the interquartile range (spread)
+are kept. A stage is flagged as slower only beyond the spreads of baseline and run
+and if it stays slower when timed again (retries).
+
+created on 2026-10-19
+"""
+
+## Set up environment
+import json
+import os
+import sys
+import time
+import numpy as np
+import rr_algorithms as rra
+import rr_synthetic as rrs
+import scipy.ndimage
+
+## Timing function
+def get_time(func, args, repeats):
+    # median and interquartile range (spread) of repeats in ms
+    # arguments are copied before each run as rra.align works in place
+    times = np.zeros(repeats)
+    for k in range(repeats):
+        argsCopy = [np.copy(a) if isinstance(a, np.ndarray) else a for a in args]
+        start = time.perf_counter()
+        result = func(*argsCopy)
+        times[k] = time.perf_counter() - start
+    q1, median, q3 = np.percentile(times*1000, [25, 50, 75])
+    return (median, q3 - q1), result
+
+## Stages as in rr_compareCandRB
+def interpolate(tsC, dataC, tsRB, dataRB, freq):
+    tsRBI, dataRBI = rra.interpolate(tsRB, dataRB, freq)
+    tsCI, dataCI = rra.interpolate(tsC, dataC, freq)
+    return tsCI, dataCI, tsRBI, dataRBI
+
+def median_filter(dataCal, size):
+    return scipy.ndimage.median_filter(dataCal, size=size)
+
+def evaluate(tsC, dataC, tsRB, dataRB, bpmPac, postMedFilt):
+    freq = np.int16(np.round(timeScale / tsC[1]))
+    tsCI, dataCI, tsRBI, dataRBI = interpolate(tsC, dataC, tsRB, dataRB, freq)
+    _, dataCal, _, dataRBal = rra.align(tsCI, dataCI, tsRBI, dataRBI, freq)
+    dataCfilt = median_filter(dataCal, postMedFilt)
+    bpmC, bpmRB, errorAbs = rra.get_bpm(dataCfilt, dataRBal, bpmPac, freq)
+    r, _, _, _ = rra.pearsonr_ci(dataCfilt, dataRBal)
+    return bpmC, bpmRB, errorAbs, r
+
+def get_name(subject):
+    return (str(subject['bpm'])+'bpm_'+str(subject['freq'])+'fps_'+str(subject['duration'])+'s_'
+            +str(subject['offset'])+'off_'+str(subject['drift'])+'drift_'+str(subject['noise'])+'noise_'
+            +str(subject['gaps'])+'gaps')
+
+def bench_subject(subject, repeats, postMedFilt):
+    tsC, dataC, tsRB, dataRB = rrs.get_subject(**subject)
+    if compact:
+        tsC, dataC = rra.CompactSignal(tsC, dataC)
+        tsRB, dataRB = rra.CompactSignal(tsRB, dataRB)
+    bpmPac = subject['bpm']
+    freq = np.int16(np.round(timeScale / tsC[1]))
+
+    times = {}
+    spreads = {}
+    (times['interpolate'], spreads['interpolate']), (tsCI, dataCI, tsRBI, dataRBI) = get_time(
+        interpolate, (tsC, dataC, tsRB, dataRB, freq), repeats)
+    (times['align'], spreads['align']), (_, dataCal, _, dataRBal) = get_time(
+        rra.align, (tsCI, dataCI, tsRBI, dataRBI, freq), repeats)
+    (times['median_filter'], spreads['median_filter']), dataCfilt = get_time(
+        median_filter, (dataCal, postMedFilt), repeats)
+    (times['get_bpm'], spreads['get_bpm']), _ = get_time(
+        rra.get_bpm, (dataCfilt, dataRBal, bpmPac, freq), repeats)
+    (times['pearsonr_ci'], spreads['pearsonr_ci']), _ = get_time(
+        rra.pearsonr_ci, (dataCfilt, dataRBal), repeats)
+    (times['end_to_end'], spreads['end_to_end']), (bpmC, bpmRB, errorAbs, r) = get_time(
+        evaluate, (tsC, dataC, tsRB, dataRB, bpmPac, postMedFilt), repeats)
+
+    accuracy = {'bpmC': bpmC, 'bpmRB': bpmRB, 'errAbs': errorAbs,
+                'errAbsC': abs(bpmC - bpmPac), 'errAbsRB': abs(bpmRB - bpmPac), 'r': r}
+    return {'times': times, 'spreads': spreads, 'accuracy': {k: float(v) for k, v in accuracy.items()}}
+
+def bench_roi(dec, frames, repeats):
+    rng = np.random.default_rng(dec)
+    frameSet = [rrs.get_frame(1000 + 5*np.sin(k), ROI, dec=dec, rng=rng) for k in range(frames)]
+    dec_ROI = np.asarray([np.floor(ROI[0]/dec), np.ceil(ROI[1]/dec),
+                          np.ceil(ROI[2]/dec), np.floor(ROI[3]/dec)], dtype=int)
+    times = {}
+    spreads = {}
+    for func in (rra.get_mean_depth, rra.get_median_depth):
+        def run():
+            for frame in frameSet:
+                func(frame, dec_ROI)
+        (t, spread), _ = get_time(run, (), repeats)
+        times[func.__name__] = t/frames # per frame
+        spreads[func.__name__] = spread/frames
+    return {'times': times, 'spreads': spreads, 'accuracy': {}}
+
+## Comparison functions
+def get_slower(result, base):
+    # returns stages slower than baseline beyond the spread of both runs, by slowdown and by minSlowdown
+    slower = []
+    for stage, t in result['times'].items():
+        tBase = base['times'].get(stage)
+        if tBase is None:
+            continue
+        spread = result['spreads'][stage] + base.get('spreads', {}).get(stage, 0)
+        if t > tBase*slowdown and t - tBase > max(spreadFactor*spread, minSlowdown):
+            slower.append(stage)
+    return slower
+
+def retime(results, baseline, runs):
+    # flagged benchmarks are run again up to retries times, the faster median per stage is kept
+    for _ in range(retries):
+        names = [name for name in results if name in baseline and get_slower(results[name], baseline[name])]
+        for name in names:
+            func, args = runs[name]
+            result = func(*args)
+            for stage in get_slower(results[name], baseline[name]):
+                if result['times'][stage] < results[name]['times'][stage]:
+                    results[name]['times'][stage] = result['times'][stage]
+                    results[name]['spreads'][stage] = result['spreads'][stage]
+
+def compare(results, baseline):
+    # returns list of flagged regressions
+    flags = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        for stage in get_slower(result, baseline[name]):
+            t = result['times'][stage]
+            spread = result['spreads'][stage] + baseline[name].get('spreads', {}).get(stage, 0)
+            flags.append(name+': '+stage+' slower, median '+'%.3f' % t+'ms instead of '
+                         +'%.3f' % baseline[name]['times'][stage]+'ms (spread '+'%.3f' % spread+'ms)')
+        for magnitude, value in result['accuracy'].items():
+            vBase = baseline[name]['accuracy'].get(magnitude)
+            if vBase is not None and not abs(value - vBase) <= tolerance[magnitude]:
+                flags.append(name+': '+magnitude+' drifted, '+'%.4f' % value+' instead of '+'%.4f' % vBase)
+    return flags
+
+## Set parameters
+mode = 'compare' # 'record': store results as baseline, 'compare': compare results to baseline
+filenameBaseline = 'rr_benchmark_baseline.json'
+
+# cohort, all combinations are considered (cf. rr_synthetic)
+bpms = [10, 15] # paced bpms
+freqs = [10, 15, 30] # sampling frequencies of C
+durations = [60, 3600, 28800] # 1min, 1h, 8h
+offsets = [1.5] # start of C after start of RB in s, |offset| < 3s
+drifts = [0.2] # baseline drift in amplitudes/min
+noises = [0.2] # noise in amplitudes
+gaps = [0.02] # fraction of samples lost in gaps
+seed = 0
+
+postMedFilt = 14 # filter size for median filter on C data, cf. rr_compareCandRB
+compact = False # True: float32 data with compact timestamps (cf. rra.CompactSignal)
+                # comparing to a float64 baseline shows the accuracy drift of the compact signals
+repeats = 7 # every stage is run repeats times, median and interquartile range (spread) are kept
+
+# ROI reducers: ROI of undecimated 848x480 frame, [top, bottom, left, right]
+ROI = [120, 360, 300, 550]
+decs = [1, 3] # decimation magnitudes
+frames = 100
+
+# thresholds for flagging
+slowdown = 1.25 # flag if stage takes 25% longer than baseline
+minSlowdown = 0.5 # and at least 0.5ms longer (timer noise of short stages)
+spreadFactor = 2 # and longer than spreadFactor times the summed spreads of baseline and run
+retries = 2 # flagged benchmarks are timed again up to retries times before reporting
+tolerance = {'bpmC': 0.1, 'bpmRB': 0.1, 'errAbs': 0.1, 'errAbsC': 0.1, 'errAbsRB': 0.1, 'r': 0.01}
+
+timeScale = 1000 # 1000ms = 1s
+
+## Run benchmark
+# the baseline is machine specific and not part of the repository, record it first
+if mode == 'compare' and not os.path.isfile(filenameBaseline):
+    sys.exit('No baseline '+filenameBaseline+' found, run with mode = \'record\' first')
+
+results = {}
+runs = {} # benchmark per name, to time flagged benchmarks again
+cohort = rrs.get_cohort(bpms, freqs, durations, offsets, drifts, noises, gaps, seed)
+for subject in cohort:
+    name = get_name(subject)
+    runs[name] = (bench_subject, (subject, repeats, postMedFilt))
+    results[name] = bench_subject(subject, repeats, postMedFilt)
+    acc = results[name]['accuracy']
+    print(name.ljust(60), '%10.3fms' % results[name]['times']['end_to_end'],
+          ' bpmC %6.2f  bpmRB %6.2f  PCC %.3f' % (acc['bpmC'], acc['bpmRB'], acc['r']))
+for dec in decs:
+    name = 'roi_'+str(dec)+'dec'
+    runs[name] = (bench_roi, (dec, frames, repeats))
+    results[name] = bench_roi(dec, frames, repeats)
+    print(name.ljust(60), '  '.join(k+' %.3fms/frame' % t for k, t in results[name]['times'].items()))
+
+## Store or compare baseline
+if mode == 'record':
+    with open(filenameBaseline, 'w') as f:
+        json.dump(results, f, indent=1)
+    print('Baseline stored in '+filenameBaseline)
+else:
+    with open(filenameBaseline) as f:
+        baseline = json.load(f)
+    retime(results, baseline, runs)
+    flags = compare(results, baseline)
+    for flag in flags:
+        print('REGRESSION '+flag)
+    if flags:
+        sys.exit(1)
+    print('No regression compared to '+filenameBaseline)
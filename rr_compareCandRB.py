@@ -37,6 +37,8 @@ postMedFilt = 14 # filter size for median filter on C data
                  # mean-method: 18 (max. 20)
                  # median-method: 14 (NOT HIGHER)
 dec = 3 # leave on 3, decimation filter magnitude in rr_readC was kept 3 constantly
+compact = False # True: float32 data with compact timestamps (cf. rra.CompactSignal), less memory
+                # precision impact on exemplary data cf. README
 
 pathC = 'C:/Users/sbrin/Desktop/BA/Data/Processed/'
 pathRB = 'C:/Users/sbrin/Desktop/BA/Data/Processed/'
@@ -86,8 +88,8 @@ for p in prob:
                     filenameRB = pathRB+paramSetRB+'.csv'
 
                     ## import csv-files with data from respiration belt (RB) and camera (C) respectively
-                    tsC, dataC = rra.read_csvC(filenameC)
-                    tsRB, dataRB = rra.read_csvRB(filenameRB, id)
+                    tsC, dataC = rra.read_csvC(filenameC, compact)
+                    tsRB, dataRB = rra.read_csvRB(filenameRB, id, compact)
 
                     # get frequency from C data
                     freq = np.int16(np.round(timeScale / tsC[1]))
@@ -0,0 +1,408 @@
+"""
+Concurrent ingestion of several depth streams (e.g. multiple D435 per room) with
+streaming respiratory rate (RR) estimates per stream
+
+Structure:
+# every frame source runs on its own capture thread, feeding a bounded frame queue
+# if a queue is full, its oldest frame is dropped and counted, capture never waits for processing
+# a pool of worker threads does decimation and ROI reduction (mean or median, cf. rr_readC),
+#   a stream is processed by one worker at a time, so its frames keep their order
+# per stream, depths of the last window seconds are kept and the RR is estimated
+#   every publishEvery seconds (stream time), estimates are published via callback
+# without pacing, the supposed RR is the dominant frequency of the window inside the
+#   range of RRs (cf. get_supposed_bpm), so no estimate depends on the previous one
+
+frame sources (start, read, stop; attributes fps and ROI):
+# read returns (timestamp, depth image), () if no frame arrived in time (live device), None at end
+# RealSenseSource: live D435 (serial) or .bag-file, needs pyrealsense2
+# SyntheticSource: stand-in for testing, cf. rr_synthetic
+
+created on 2026-10-19
+"""
+import queue
+import threading
+import time
+import numpy as np
+import rr_algorithms as rra
+import rr_synthetic as rrs
+import scipy.ndimage
+
+try:
+    import pyrealsense2 as rs
+except ImportError: # synthetic sources work without
+    rs = None
+
+## Frame sources
+class RealSenseSource:
+    '''
+    Live D435 given by serial (None: any connected device) or .bag-file given by filename
+    read returns (timestamp in ms, depth image as uint16 array in mm), None at end of file,
+    () if a live device delivered no frame within timeout ms (counted, capture goes on)
+    '''
+    def __init__(self, serial=None, filename=None, fps=15, width=848, height=480, realTime=True,
+                 timeout=1000):
+        if rs is None:
+            raise ImportError('RealSenseSource needs pyrealsense2')
+        self.serial = serial
+        self.filename = filename
+        self.fps = fps
+        self.width = width
+        self.height = height
+        self.realTime = realTime
+        self.timeout = timeout
+        self.ROI = None
+        self.pipe = None
+
+    def start(self):
+        self.pipe = rs.pipeline()
+        cfg = rs.config()
+        if self.filename is not None:
+            cfg.enable_device_from_file(self.filename, repeat_playback=False)
+        else:
+            if self.serial is not None:
+                cfg.enable_device(self.serial)
+            cfg.enable_stream(rs.stream.depth, self.width, self.height, rs.format.z16, self.fps)
+        profile = self.pipe.start(cfg)
+        if self.filename is not None:
+            profile.get_device().as_playback().set_real_time(self.realTime)
+        # ROI from first frame, cf. rr_readC
+        frame = self.pipe.wait_for_frames()
+        self.ROI = np.asarray([frame.get_frame_metadata(rs.frame_metadata_value.exposure_roi_top),
+                               frame.get_frame_metadata(rs.frame_metadata_value.exposure_roi_bottom),
+                               frame.get_frame_metadata(rs.frame_metadata_value.exposure_roi_left),
+                               frame.get_frame_metadata(rs.frame_metadata_value.exposure_roi_right)], dtype=int)
+
+    def read(self):
+        frame_present, frame = self.pipe.try_wait_for_frames(self.timeout)
+        if not frame_present:
+            # only playback of a .bag-file ends, a live device may just be late
+            return None if self.filename is not None else ()
+        depth_frame = frame.get_depth_frame()
+        # copy releases the frame to the librealsense frame pool right away
+        return depth_frame.get_timestamp(), np.asanyarray(depth_frame.get_data()).copy()
+
+    def stop(self):
+        self.pipe.stop()
+
+class SyntheticSource:
+    '''
+    Stand-in for a D435 filming a breathing proband (cf. rr_synthetic)
+    realTime: frames are delivered at fps, otherwise as fast as possible
+    hole: side length of a patch without depth (=0) inside the ROI of every 8th frame, as
+          real depth images have; 0: no patch
+    '''
+    def __init__(self, bpm=15, fps=15, duration=60, dist=1, ROI=(120, 360, 300, 550),
+                 realTime=True, hole=20, seed=0):
+        self.bpm = bpm
+        self.fps = fps
+        self.duration = duration
+        self.depth = dist*1000 # in mm
+        self.ROI = np.asarray(ROI, dtype=int)
+        self.realTime = realTime
+        self.hole = hole
+        self.seed = seed
+
+    def start(self):
+        # a few noisy frames are prepared, breathing is added to the ROI while reading
+        rng = np.random.default_rng(self.seed)
+        self.frames = [rrs.get_frame(self.depth, self.ROI, rng=rng).get_data() for _ in range(8)]
+        top, left = self.ROI[0] + 10, self.ROI[2] + 10
+        self.frames[0][top:top+self.hole, left:left+self.hole] = 0
+        self.k = 0
+        self.tStart = time.perf_counter()
+
+    def read(self):
+        t = self.k/self.fps
+        if t >= self.duration:
+            return None
+        if self.realTime:
+            delay = self.tStart + t - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        image = self.frames[self.k % len(self.frames)].copy()
+        top, bottom, left, right = self.ROI
+        roi = image[top:bottom+1, left:right+1]
+        shift = np.round(rrs.ampC*rrs.get_respiration(t, self.bpm, self.seed))
+        np.subtract(roi, np.int32(shift), out=roi, where=roi > 0, casting='unsafe') # inhalation: less depth
+        self.k += 1
+        return t*1000, image
+
+    def stop(self):
+        pass
+
+## Decimation and ROI reduction
+def get_decimation(depth_image, ROI, dec):
+    '''
+    Decimation of the ROI only, like rs.decimation_filter: median (dec 2-3) or mean (dec 4-8)
+    of the valid (>0) pixels of every dec x dec block. The decimated ROI is chosen as in rr_readC.
+    :return: decimated depth image of ROI
+    '''
+    if dec == 1:
+        return depth_image[ROI[0]:ROI[1]+1, ROI[2]:ROI[3]+1]
+    dec_ROI = [int(np.floor(ROI[0]/dec)), int(np.ceil(ROI[1]/dec)),
+               int(np.ceil(ROI[2]/dec)), int(np.floor(ROI[3]/dec))]
+    block = depth_image[dec_ROI[0]*dec:(dec_ROI[1]+1)*dec, dec_ROI[2]*dec:(dec_ROI[3]+1)*dec]
+    h, w = block.shape[0]//dec, block.shape[1]//dec
+    block = block[:h*dec, :w*dec].reshape(h, dec, w, dec).swapaxes(1, 2).reshape(h, w, dec*dec)
+    # blocks without valid pixel stay 0, so the reducers skip them
+    valid = np.count_nonzero(block, axis=2)
+    if dec >= 4:
+        # integer mean, as librealsense
+        return (np.sum(block, axis=2, dtype=np.int64)//np.maximum(valid, 1)).astype(depth_image.dtype)
+    # sorting puts invalid pixels (=0) first, the median of the valid ones lies behind them
+    index = np.minimum(dec*dec - valid + np.maximum(valid - 1, 0)//2, dec*dec - 1)
+    dec_image = np.take_along_axis(np.sort(block, axis=2), index[:, :, None], axis=2)[:, :, 0]
+    dec_image[valid == 0] = 0
+    return dec_image
+
+## Streaming RR estimation
+def get_supposed_bpm(data, freq, bpmRange=(6, 30), pad=4):
+    '''
+    Supposed RR of a window without pacing: frequency of the highest peak of the
+    spectrum inside bpmRange. The spectrum is zero-padded pad times for a finer
+    resolution than 1/window.
+    :return: bpm, nan if bpmRange holds no frequency of the spectrum
+    '''
+    n = pad*data.size
+    spectrum = np.abs(np.fft.rfft(data - np.mean(data), n=n))
+    bpms = np.fft.rfftfreq(n, 1/freq)*60
+    inRange = (bpms >= bpmRange[0]) & (bpms <= bpmRange[1])
+    if not np.any(inRange):
+        return np.nan
+    return bpms[inRange][np.argmax(spectrum[inRange])]
+
+class RREstimator:
+    '''
+    Keeps the depths of the last window seconds of one stream and estimates the RR
+    as rr_compareCandRB does for C: interpolation, median filter, get_bpm_signal
+    bpmPac: paced bpm, None: supposed bpm of every window (cf. get_supposed_bpm)
+    Depths are kept in a float32 ring buffer, timestamps as int32 offsets (ticks of
+    rra.CompactTimestamps) from an int64 start, cf. rra.CompactSignal
+    '''
+    def __init__(self, fps, window=60, minWindow=20, bpmPac=None, bpmRange=(6, 30), postMedFilt=14,
+                 timeScale=1000):
+        self.fps = fps
+        self.window = window
+        self.minWindow = minWindow
+        self.bpmPac = bpmPac
+        self.bpmRange = bpmRange # range of supposed bpm
+        self.postMedFilt = postMedFilt
+        self.timeScale = timeScale
+        self.tick = rra.CompactTimestamps.tick # in ms
+        self.tsStart = None # in ticks
+        self.tsSet = np.zeros(int(window*fps), dtype=np.int32) # offsets from tsStart in ticks
+        self.depthSet = np.zeros(int(window*fps), dtype=np.float32)
+        self.count = 0 # samples in ring buffer
+        self.head = 0 # position of next sample
+
+    def add(self, timestamp, depth):
+        if np.isnan(depth): # ROI without valid pixel
+            return
+        ticks = np.int64(np.round(timestamp/self.tick))
+        if self.tsStart is None:
+            self.tsStart = ticks
+        if ticks - self.tsStart > np.iinfo(np.int32).max//2:
+            # long session: move start to oldest sample, offsets stay within int32
+            oldest = self.tsSet[(self.head - self.count) % self.tsSet.size]
+            self.tsSet -= oldest
+            self.tsStart += oldest
+        self.tsSet[self.head] = ticks - self.tsStart
+        self.depthSet[self.head] = depth
+        self.head = (self.head + 1) % self.tsSet.size
+        self.count = min(self.count + 1, self.tsSet.size)
+
+    def estimate(self):
+        if self.count < 2:
+            return np.nan
+        order = (self.head - self.count + np.arange(self.count)) % self.tsSet.size
+        offsets = self.tsSet[order]
+        if (offsets[-1] - offsets[0])*self.tick < self.minWindow*self.timeScale:
+            return np.nan
+        ts = rra.CompactTimestamps(self.tsStart + offsets[0], self.count, offsets=offsets - offsets[0])
+        data = self.depthSet[order]
+        data = (data - np.mean(data))*-1 # cf. rra.read_csvC
+        _, dataI = rra.interpolate(ts, data, self.fps, self.timeScale)
+        dataFilt = scipy.ndimage.median_filter(dataI, size=self.postMedFilt)
+        bpmPac = self.bpmPac
+        if bpmPac is None:
+            bpmPac = get_supposed_bpm(dataFilt, self.fps, self.bpmRange)
+            if np.isnan(bpmPac):
+                return np.nan
+        return rra.get_bpm_signal(dataFilt, bpmPac, self.fps, self.timeScale)
+
+## Ingestion service
+class Stream:
+    def __init__(self, name, source, queueSize, estimator):
+        self.name = name
+        self.source = source
+        self.frames = queue.Queue(maxsize=queueSize)
+        self.estimator = estimator
+        self.lock = threading.Lock()
+        self.scheduled = False # True while in ready queue or being processed by a worker
+        self.captured = 0
+        self.dropped = 0
+        self.processed = 0
+        self.timeouts = 0 # no frame in time from live device
+        self.errors = 0 # frames failing in capture (ends the stream) or processing
+        self.error = None # last error
+        self.tsPublished = None
+        self.bpm = np.nan
+
+class IngestService:
+    '''
+    Ingestion of N frame sources with capture threads, bounded frame queues and a worker pool
+    :param sources: dict name: frame source
+    :param workers: number of worker threads
+    :param queueSize: frames per stream queue (>=1), oldest frame dropped if full
+    :param dec: decimation magnitude, 1<=dec<=8
+    :param method: 'mean' or 'median', cf. rr_readC
+    :param window: s of depths kept for RR estimation
+    :param publishEvery: s (stream time) between estimates
+    :param onEstimate: callback(name, timestamp, bpm), called from worker threads
+    :param estimatorArgs: further parameters of RREstimator
+    '''
+    def __init__(self, sources, workers=4, queueSize=30, dec=3, method='median', window=60,
+                 publishEvery=5, onEstimate=None, timeScale=1000, **estimatorArgs):
+        if queueSize < 1:
+            raise ValueError('queueSize must be at least 1, got '+str(queueSize))
+        self.workers = workers
+        self.dec = dec
+        self.reduce = rra.get_mean_depth if method == 'mean' else rra.get_median_depth
+        self.publishEvery = publishEvery
+        self.onEstimate = onEstimate
+        self.timeScale = timeScale
+        self.streams = [Stream(name, source, queueSize,
+                               RREstimator(source.fps, window, timeScale=timeScale, **estimatorArgs))
+                        for name, source in sources.items()]
+        self.ready = queue.Queue() # streams with frames waiting for a worker
+        self.running = threading.Event()
+        self.captureThreads = []
+        self.workerThreads = []
+
+    def start(self):
+        self.running.set()
+        started = []
+        try:
+            for stream in self.streams:
+                stream.source.start()
+                started.append(stream)
+        except Exception:
+            # sources started so far would keep their devices busy
+            self.running.clear()
+            for stream in started:
+                self.stop_source(stream)
+            raise
+        for stream in self.streams:
+            thread = threading.Thread(target=self.capture, args=(stream,), name='capture-'+str(stream.name),
+                                      daemon=True)
+            self.captureThreads.append(thread)
+        for k in range(self.workers):
+            thread = threading.Thread(target=self.work, name='worker-'+str(k), daemon=True)
+            self.workerThreads.append(thread)
+        for thread in self.captureThreads + self.workerThreads:
+            thread.start()
+
+    def capture(self, stream):
+        try:
+            while self.running.is_set():
+                try:
+                    frame = stream.source.read()
+                except Exception as e: # e.g. device disconnected, the stream ends
+                    stream.errors += 1
+                    stream.error = repr(e)
+                    break
+                if frame is None:
+                    break
+                if not frame:
+                    stream.timeouts += 1
+                    continue
+                stream.captured += 1
+                try:
+                    stream.frames.put_nowait(frame)
+                except queue.Full:
+                    # drop oldest frame, only this thread puts, so there is room afterwards
+                    try:
+                        stream.frames.get_nowait()
+                        stream.dropped += 1
+                    except queue.Empty:
+                        pass
+                    stream.frames.put_nowait(frame)
+                self.schedule(stream)
+        finally:
+            self.stop_source(stream)
+
+    def stop_source(self, stream):
+        try:
+            stream.source.stop()
+        except Exception as e:
+            stream.errors += 1
+            stream.error = repr(e)
+
+    def schedule(self, stream):
+        with stream.lock:
+            if not stream.scheduled:
+                stream.scheduled = True
+                self.ready.put(stream)
+
+    def work(self):
+        while True:
+            stream = self.ready.get()
+            if stream is None:
+                break
+            # process a batch, then give other streams a chance
+            for _ in range(stream.frames.maxsize):
+                try:
+                    timestamp, depth_image = stream.frames.get_nowait()
+                except queue.Empty:
+                    with stream.lock:
+                        if stream.frames.empty():
+                            stream.scheduled = False
+                            break
+                    continue
+                try:
+                    self.process(stream, timestamp, depth_image)
+                except Exception as e: # a broken frame must neither kill the worker nor block the stream
+                    stream.errors += 1
+                    stream.error = repr(e)
+            else:
+                self.ready.put(stream)
+
+    def process(self, stream, timestamp, depth_image):
+        dec_image = get_decimation(depth_image, stream.source.ROI, self.dec)
+        depth = self.reduce(dec_image, [0, dec_image.shape[0]-1, 0, dec_image.shape[1]-1])
+        stream.estimator.add(timestamp, depth)
+        stream.processed += 1
+        if stream.tsPublished is None:
+            stream.tsPublished = timestamp
+        elif timestamp - stream.tsPublished >= self.publishEvery*self.timeScale:
+            stream.tsPublished = timestamp
+            bpm = stream.estimator.estimate()
+            if not np.isnan(bpm):
+                stream.bpm = bpm
+                if self.onEstimate is not None:
+                    self.onEstimate(stream.name, timestamp, bpm)
+
+    def wait(self):
+        # until all sources have no more frames (file and synthetic sources)
+        for thread in self.captureThreads:
+            thread.join()
+
+    def stop(self, timeout=10):
+        # timeout: s to process frames still queued, frames left over stay in stats as queued
+        self.running.clear()
+        for thread in self.captureThreads:
+            thread.join()
+        tEnd = time.perf_counter() + timeout
+        while any(stream.scheduled for stream in self.streams) and time.perf_counter() < tEnd:
+            time.sleep(0.01)
+        for _ in self.workerThreads:
+            self.ready.put(None)
+        for thread in self.workerThreads:
+            thread.join(max(tEnd - time.perf_counter(), 0.1))
+
+    def stats(self):
+        return {stream.name: {'captured': stream.captured, 'dropped': stream.dropped,
+                              'processed': stream.processed, 'queued': stream.frames.qsize(),
+                              'timeouts': stream.timeouts, 'errors': stream.errors, 'error': stream.error,
+                              'bpm': stream.bpm}
+                for stream in self.streams}
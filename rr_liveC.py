@@ -0,0 +1,48 @@
+"""
+Live respiratory rate (RR) of all connected D435 depth cameras (cf. rr_ingest)
+
+specifications of the cameras, cf. rr_readC:
+# ONLY depth stream
+# set ROI, Enable Auto Exposure (ROI as extracted from metadata)
+# resolution: 848x480
+
+RR estimates are printed per camera (serial number) until interrupted with Ctrl+C,
+followed by captured, dropped and processed frames.
+
+created on 2026-10-19
+"""
+
+## Set up environment
+import time
+import pyrealsense2 as rs
+import rr_ingest as rri
+
+## Set parameters
+fps = 15 # sampling frequencies: 15fps, 30fps
+dec = 3 # magnitude of decimation, 1<=dec<=8, recommendation: dec=3
+method = 'median' # methods: 'mean', 'median'
+workers = 4 # worker threads
+queueSize = 15 # frames per camera queue
+window = 60 # s of depth considered per RR estimate
+publishEvery = 5 # s between RR estimates
+
+## Run
+def print_estimate(name, timestamp, bpm):
+    print(name+': '+'%.1f' % bpm+' bpm')
+
+serials = [device.get_info(rs.camera_info.serial_number) for device in rs.context().query_devices()]
+sources = {serial: rri.RealSenseSource(serial=serial, fps=fps) for serial in serials}
+service = rri.IngestService(sources, workers=workers, queueSize=queueSize, dec=dec, method=method,
+                            window=window, publishEvery=publishEvery, onEstimate=print_estimate)
+service.start()
+try:
+    while True:
+        time.sleep(1)
+except KeyboardInterrupt:
+    pass
+service.stop()
+
+for name, stats in service.stats().items():
+    print(name+': captured '+str(stats['captured'])+', dropped '+str(stats['dropped'])
+          +', processed '+str(stats['processed'])+', timeouts '+str(stats['timeouts'])
+          +', errors '+str(stats['errors']))
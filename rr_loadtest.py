@@ -0,0 +1,54 @@
+"""
+Load test of the concurrent ingestion (cf. rr_ingest) with synthetic real-time streams
+
+The number of streams is increased step by step until frames start dropping, i.e.
+decimation and ROI reduction cannot keep up with capture anymore.
+Per step: captured, dropped and processed frames of all streams and the mean
+absolute error of the published RR estimates.
+
+Under "Set parameters" one can choose the stream setting and the worker pool.
+
+created on 2026-10-19
+"""
+
+## Set up environment
+import numpy as np
+import rr_ingest as rri
+
+## Set parameters
+streamCounts = [1, 2, 4, 8, 16, 32, 64] # numbers of streams, increased until frames drop
+fps = 30 # sampling frequency of every stream: 10fps, 15fps, 30fps
+bpms = [10, 12, 15, 18, 20] # RRs of the streams, assigned in turn
+duration = 30 # s per step, > minWindow of estimator for RR estimates
+workers = 4 # worker threads
+queueSize = 15 # frames per stream queue, 15 frames = 0.5s at 30fps
+dec = 3 # decimation magnitude
+method = 'median' # methods: 'mean', 'median'
+publishEvery = 5 # s between RR estimates
+dropTolerance = 0 # stop as soon as more frames drop (fraction of captured frames)
+
+## Run load test
+print('streams  captured   dropped  dropped%  processed  fps/stream  RR err [bpm]')
+for count in streamCounts:
+    sources = {}
+    for k in range(count):
+        sources['cam'+str(k)] = rri.SyntheticSource(bpm=bpms[k % len(bpms)], fps=fps, duration=duration,
+                                                    realTime=True, seed=k)
+    service = rri.IngestService(sources, workers=workers, queueSize=queueSize, dec=dec, method=method,
+                                publishEvery=publishEvery)
+    service.start()
+    service.wait()
+    service.stop()
+
+    stats = service.stats()
+    captured = sum(s['captured'] for s in stats.values())
+    dropped = sum(s['dropped'] for s in stats.values())
+    processed = sum(s['processed'] for s in stats.values())
+    errAbs = np.nanmean([np.abs(stats[name]['bpm'] - source.bpm) for name, source in sources.items()])
+    print('%7d  %8d  %8d  %7.2f%%  %9d  %10.1f  %12.2f' % (count, captured, dropped, dropped/captured*100,
+                                                          processed, processed/count/duration, errAbs))
+    if dropped > dropTolerance*captured:
+        print('Frames dropping with '+str(count)+' streams')
+        break
+else:
+    print('No frames dropped with up to '+str(streamCounts[-1])+' streams')
@@ -40,39 +40,6 @@ def get_decimation(depth_frame, dec):
     dec_depth_frame = dec_depth_frame.as_depth_frame()
     return dec_depth_frame
 
-## Mean depth function (method 2)
-def get_mean_depth(frame, ROI):
-    # Get ROI
-    ROI_top = ROI[0]
-    ROI_bottom = ROI[1]
-    ROI_left = ROI[2]
-    ROI_right = ROI[3]
-    # matrix depth_image containing depth value in mm for every pixel x, y
-    depth_image = np.asanyarray(frame.get_data())
-    depth_image_ROI = depth_image[ROI_top:ROI_bottom+1, ROI_left:ROI_right+1]   # caution: here indexes row, col; not x, y
-    # substitute entries = 0 by nan
-    depth_image_ROI = np.where(depth_image_ROI == 0.0, np.nan, depth_image_ROI)
-    # mean of all not nan values in array
-    mean_depth = np.nanmean(depth_image_ROI) # unit already mm
-    return mean_depth
-
-# Median depth function (method 2)
-def get_median_depth(frame, ROI):
-    # Get ROI
-    ROI_top = ROI[0]
-    ROI_bottom = ROI[1]
-    ROI_left = ROI[2]
-    ROI_right = ROI[3]
-    # matrix depth_image containing depth value in mm for every pixel x, y
-    depth_image = np.asanyarray(frame.get_data())
-    depth_image_ROI = depth_image[ROI_top:ROI_bottom + 1,
-                      ROI_left:ROI_right + 1]  # caution: here indexes row, col; not x, y
-    # substitute entries = 0 by nan
-    depth_image_ROI = np.where(depth_image_ROI == 0.0, np.nan, depth_image_ROI)
-    # median of all not nan values in array
-    median_depth = np.nanmedian(depth_image_ROI)  # unit already mm
-    return median_depth
-
 ## Set parameters
 prob = [1, 2, 4, 5, 6, 7, 8, 9] # probands: 1, 2, (3), 4, 5, 6, 7, 8, 9 so far
                                 # leave out 3 as there are not all datasets for him
@@ -138,7 +105,7 @@ for p in prob:
                         timestamp_set = np.append(timestamp_set, timestamp)
                         # getting array "depth_set" (with decimated depth frames)
                         dec_depth_frame = get_decimation(depth_frame, dec)
-                        depth = get_median_depth(dec_depth_frame, dec_ROI)
+                        depth = rra.get_median_depth(dec_depth_frame, dec_ROI)
                         depth_set = np.append(depth_set, depth)
                     pipe.stop()
 
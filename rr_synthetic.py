@@ -0,0 +1,146 @@
+"""
+Synthetic data resembling the recordings of camera (C) and respiration belt (RB)
+used to benchmark and test the programs without .bag- or .csv-files
+
+Both signals are derived from the same respiration of a virtual proband, so C and RB
+of one subject can be aligned and compared just like the recorded data:
+# C: depth signal as returned by rra.read_csvC (in mm, mean removed, inverted)
+# RB: force signal as returned by rra.read_csvRB (in N, mean removed)
+# timestamps in ms, starting at 0
+# NaN gaps are removed the way rra.read_csvRB does, leaving holes in the timestamps
+
+parameters of a subject:
+# bpm: respiratory rate in breaths/min
+# freq: sampling frequency of C: 10fps, 15fps, 30fps (RB is always sampled with 10fps)
+# duration: length of recording in s, e.g. 60s (1min) up to 28800s (8h)
+# offset: start of C recording after start of RB recording in s, |offset| < 3s (cf. rra.align)
+# drift: slow baseline wander in multiples of the breathing amplitude per minute
+# noise: std of white noise in multiples of the breathing amplitude (C), RB gets a quarter of it
+# gaps: fraction of samples lost in gaps of about 1s length
+# seed: random seed, same seed --> same proband
+
+created on 2026-10-19
+"""
+import numpy as np
+
+ampC = 5 # breathing amplitude of chest depth in mm
+ampRB = 2 # breathing amplitude of belt force in N
+freqRB = 10 # sampling frequency of respiration belt
+gapLength = 1 # mean length of a gap in s
+gapFree = 2 # no gaps during the first seconds, rr_compareCandRB derives freq from tsC[1]
+
+def get_respiration(t, bpm, seed=0):
+    '''
+    Breathing of a virtual proband at times t (in s), amplitude 1.
+    Breath-to-breath variability is modelled by a slow deterministic phase modulation,
+    so C and RB sampling the same proband at different times see the same respiration.
+    :param t: times in s
+    :param bpm: mean respiratory rate
+    :param seed: proband
+    :return: respiration in [-1, 1]
+    '''
+    rng = np.random.default_rng(seed)
+    phase = 2*np.pi*bpm/60 * t
+    # three slow modulations, periods of 30s-120s
+    for fMod, pMod in zip(rng.uniform(1/120, 1/30, 3), rng.uniform(0, 2*np.pi, 3)):
+        phase += 0.3 * np.sin(2*np.pi*fMod*t + pMod)
+    # inhalation shorter than exhalation
+    resp = np.sin(phase) + 0.2*np.sin(2*phase - np.pi/2)
+    return resp / 1.2
+
+def get_gaps(size, freq, gaps, rng):
+    '''
+    :return: boolean mask, True where the sample is lost
+    '''
+    mask = np.zeros(size, dtype=bool)
+    if gaps <= 0:
+        return mask
+    gapL = max(int(gapLength*freq), 1)
+    start = int(gapFree*freq)
+    count = int(np.round(gaps*size/gapL))
+    for s in rng.integers(start, max(size - gapL, start + 1), count):
+        mask[s:s + gapL] = True
+    return mask
+
+def get_signal(t, bpm, amp, drift, noise, gaps, freq, rng, seed):
+    data = amp*get_respiration(t, bpm, seed)
+    data += drift*amp*t/60
+    data += rng.normal(0, noise*amp, t.size)
+    data[get_gaps(t.size, freq, gaps, rng)] = np.nan
+    ts = t*1000 # s-->ms
+    # removing nan-entries
+    ts = ts[~(np.isnan(data))]
+    data = data[~(np.isnan(data))]
+    data = data - np.mean(data)
+    return ts, data
+
+def get_signalC(bpm, freq, duration, offset=0, drift=0, noise=0.1, gaps=0, seed=0):
+    rng = np.random.default_rng([seed, 0])
+    t = np.arange(0, duration, 1/freq)
+    tsC, dataC = get_signal(t + offset, bpm, ampC, drift, noise, gaps, freq, rng, seed)
+    tsC = tsC - offset*1000 # C recording starts at its own timestamp 0
+    return tsC, dataC
+
+def get_signalRB(bpm, duration, drift=0, noise=0.1, gaps=0, seed=0):
+    rng = np.random.default_rng([seed, 1])
+    t = np.arange(0, duration, 1/freqRB)
+    return get_signal(t, bpm, ampRB, drift, noise/4, gaps, freqRB, rng, seed)
+
+def get_subject(bpm=15, freq=15, duration=60, offset=0, drift=0, noise=0.1, gaps=0, seed=0):
+    '''
+    :return: tsC, dataC, tsRB, dataRB as after rra.read_csvC and rra.read_csvRB
+    '''
+    tsC, dataC = get_signalC(bpm, freq, duration, offset, drift, noise, gaps, seed)
+    tsRB, dataRB = get_signalRB(bpm, duration, drift, noise, gaps, seed)
+    return tsC, dataC, tsRB, dataRB
+
+def get_cohort(bpms, freqs, durations, offsets=(0,), drifts=(0,), noises=(0.1,), gaps=(0,), seed=0):
+    '''
+    All combinations of the given parameters, each one a dict of get_subject parameters.
+    Every subject gets its own seed.
+    '''
+    cohort = []
+    for bpm in bpms:
+        for freq in freqs:
+            for duration in durations:
+                for offset in offsets:
+                    for drift in drifts:
+                        for noise in noises:
+                            for gap in gaps:
+                                cohort.append({'bpm': bpm, 'freq': freq, 'duration': duration,
+                                               'offset': offset, 'drift': drift, 'noise': noise,
+                                               'gaps': gap, 'seed': seed + len(cohort)})
+    return cohort
+
+class DepthFrame:
+    '''
+    Stand-in for a pyrealsense2 depth frame, offering get_data and get_timestamp
+    '''
+    def __init__(self, depth_image, timestamp=0.0):
+        self.depth_image = depth_image
+        self.timestamp = timestamp
+
+    def get_data(self):
+        return self.depth_image
+
+    def get_timestamp(self):
+        return self.timestamp
+
+def get_frame(depth, ROI, width=848, height=480, dec=1, invalid=0.05, timestamp=0.0, rng=None):
+    '''
+    Depth frame (uint16, mm) of a chest at distance depth inside ROI in front of a wall.
+    :param depth: chest depth in mm
+    :param ROI: [top, bottom, left, right] of the undecimated frame
+    :param dec: decimation magnitude, shrinks frame and ROI as rr_readC does
+    :param invalid: fraction of pixels without depth (=0)
+    '''
+    if rng is None:
+        rng = np.random.default_rng()
+    width = int(np.ceil(width/dec))
+    height = int(np.ceil(height/dec))
+    top, bottom = int(np.floor(ROI[0]/dec)), int(np.ceil(ROI[1]/dec))
+    left, right = int(np.ceil(ROI[2]/dec)), int(np.floor(ROI[3]/dec))
+    image = rng.normal(depth + 1000, 10, (height, width))
+    image[top:bottom+1, left:right+1] = rng.normal(depth, 2, (bottom+1-top, right+1-left))
+    image[rng.random((height, width)) < invalid] = 0
+    return DepthFrame(image.astype(np.uint16), timestamp)